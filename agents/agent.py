@@ -2,6 +2,46 @@ from utilities import operators
 
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional: without it the kernels below run as plain NumPy.
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def _product_fusion(belief1, belief2, var_lambda, product_sum):
+    """ Dampened product-operator fusion of two belief arrays. """
+
+    new_belief = (belief1 * belief2) / product_sum
+
+    return (var_lambda / new_belief.size) + ((1 - var_lambda) * new_belief)
+
+
+@njit(cache=True)
+def _average_fusion(belief1, belief2):
+    """ Element-wise midpoint of two belief arrays. """
+
+    return (belief1 + belief2) / 2
+
+
+# Interning table for combined preference sets. As the population approaches
+# consensus many agents hold identical preferences, so sharing one frozenset
+# per distinct value avoids keeping duplicate hash tables alive.
+_preference_intern = {}
+
+
+def _intern_preferences(preferences):
+    """ Return the canonical shared frozenset for the given preference set. """
+
+    preferences = frozenset(preferences)
+
+    return _preference_intern.setdefault(preferences, preferences)
+
+
 class Agent:
 
     preferences     = None
@@ -18,6 +58,13 @@ class Agent:
         self.since_change = 0
         self.random_instance = random_instance
         self.rng = rng
+        # Cache the preferences expanded with their reverse relations so that
+        # find_evidence need not rebuild the set on every call, plus a tuple
+        # view for samplers that require an indexable sequence.
+        self._expanded = preferences | {(y,x) for x,y in preferences}
+        self._pref_tuple = tuple(preferences)
+        # Lazily-built mapping from state to its rank in the true ordering.
+        self._true_rank = None
 
 
     def steady_state(self, threshold):
@@ -35,14 +82,17 @@ class Agent:
         # Combine the preference sets
         preferences = prefs1 | prefs2
 
-        # Now remove inconsistencies
-        consistent_prefs = [(x,y) for x,y in preferences if (y,x) not in preferences]
-        preferences = set(consistent_prefs)
+        # Now remove inconsistencies: any pair present in both directions is
+        # removed by a single C-level set difference.
+        preferences -= {(y,x) for x,y in preferences}
 
-        if Agent.form_closure:
+        # Stored preference sets are already transitively closed when closure
+        # is enabled, so recomputing it is only needed when the combination
+        # actually introduced new relations.
+        if Agent.form_closure and preferences != prefs1 and preferences != prefs2:
             preferences = operators.transitive_closure(preferences)
 
-        return preferences
+        return _intern_preferences(preferences)
 
 
     def evidential_updating(self, preferences):
@@ -61,6 +111,8 @@ class Agent:
             self.since_change += 1
         else:
             self.since_change = 0
+            self._expanded = preferences | {(y,x) for x,y in preferences}
+            self._pref_tuple = tuple(preferences)
 
         self.preferences = preferences
         self.evidence += 1
@@ -83,32 +135,41 @@ class Agent:
             self.since_change += 1
         else:
             self.since_change = 0
+            self._expanded = preferences | {(y,x) for x,y in preferences}
+            self._pref_tuple = tuple(preferences)
 
         self.preferences = preferences
         self.interactions += 1
 
 
-    def find_evidence(self, states, true_prefs, noise_value, comparison_errors):
+    def find_evidence(self, states, true_prefs, noise_value, comparison_error_table):
         """ Generate a random piece of evidence from the set of unknown preference relations. """
 
         evidence = set()
 
-        expanded_preferences = self.preferences | {(y,x) for x, y in self.preferences}
-        possible_evidence = true_prefs.difference(expanded_preferences)
-        # print(possible_evidence)
-
-        try:
-            choice = self.random_instance.sample(possible_evidence, 1)[0]
-            # print(choice)
-        except ValueError:
+        if not true_prefs:
             return evidence
 
+        # Draw a pair directly from the true ordering, rejecting relations the
+        # agent already holds (in either direction). This avoids materialising
+        # the set difference on every call; if rejection keeps failing, fall
+        # back to the explicit difference to avoid a long rejection loop.
+        for _ in range(4):
+            choice = true_prefs[self.random_instance.randrange(len(true_prefs))]
+            if choice not in self._expanded:
+                break
+        else:
+            possible_evidence = set(true_prefs).difference(self._expanded)
+            # print(possible_evidence)
+            if not possible_evidence:
+                return evidence
+            choice = self.random_instance.choice(tuple(possible_evidence))
+
         if noise_value is None:
             evidence.add(choice)
             return evidence
 
-        difference = abs(choice[0] - choice[1]) - 1
-        comp_error = comparison_errors[difference]
+        comp_error = comparison_error_table[choice[0], choice[1]]
 
         if self.random_instance.random() > comp_error:
             evidence.add(choice)
@@ -118,17 +179,16 @@ class Agent:
         return evidence
 
 
-    def random_evidence(self, states, true_order, noise_value, comparison_errors):
+    def random_evidence(self, states, true_order, noise_value, comparison_error_table):
         """ Generate a random piece of evidence regardless of current belief. """
 
         evidence = set()
-        shuffled_states = [x for x in range(states)]
-        self.random_instance.shuffle(shuffled_states)
-        index_i = shuffled_states.pop()
-        index_j = shuffled_states.pop()
+        index_i, index_j = self.random_instance.sample(range(states), 2)
 
-        pos_i = true_order.index(index_i)
-        pos_j = true_order.index(index_j)
+        if self._true_rank is None:
+            self._true_rank = {state: rank for rank, state in enumerate(true_order)}
+        pos_i = self._true_rank[index_i]
+        pos_j = self._true_rank[index_j]
 
         if pos_i < pos_j:
             best_index = index_i
@@ -141,8 +201,7 @@ class Agent:
             evidence.add((best_index, worst_index))
             return evidence
 
-        difference = abs(pos_i - pos_j) - 1
-        comp_error = comparison_errors[difference]
+        comp_error = comparison_error_table[pos_i, pos_j]
 
         if self.random_instance.random() > comp_error:
             evidence.add((best_index, worst_index))
@@ -163,9 +222,11 @@ class Bandwidth(Agent):
 
 
     @staticmethod
-    def combine(prefs1, prefs2, random_instance, bandwidth_limit = None):
+    def combine(prefs1, prefs2, random_instance, bandwidth_limit = None, seq1 = None, seq2 = None):
         """
-        A renormalised sum of the two preference sets.
+        A renormalised sum of the two preference sets. When limiting bandwidth,
+        the agents' cached tuple views (seq1/seq2) may be supplied so that the
+        preference sets need not be copied into lists for sampling.
         """
 
         # Combine the preference sets
@@ -173,30 +234,33 @@ class Bandwidth(Agent):
             preferences = prefs1 | prefs2
 
             # Now remove inconsistencies
-            consistent_prefs = [(x,y) for x,y in preferences if (y,x) not in preferences]
-            preferences = set(consistent_prefs)
+            preferences -= {(y,x) for x,y in preferences}
 
-            if Agent.form_closure:
+            if Agent.form_closure and preferences != prefs1 and preferences != prefs2:
                 preferences = operators.transitive_closure(preferences)
 
-            return preferences
+            return _intern_preferences(preferences)
         else:
-            set1 = set(random_instance.sample(list(prefs1), bandwidth_limit)) if bandwidth_limit <= len(prefs1) else prefs1
-            set2 = set(random_instance.sample(list(prefs2), bandwidth_limit)) if bandwidth_limit <= len(prefs2) else prefs2
+            if seq1 is None:
+                seq1 = list(prefs1)
+            if seq2 is None:
+                seq2 = list(prefs2)
+            set1 = set(random_instance.sample(seq1, bandwidth_limit)) if bandwidth_limit <= len(prefs1) else prefs1
+            set2 = set(random_instance.sample(seq2, bandwidth_limit)) if bandwidth_limit <= len(prefs2) else prefs2
             preferences1 = prefs1 | set2
             preferences2 = set1 | prefs2
 
             # Now remove inconsistencies
-            consistent_prefs1 = [(x,y) for x,y in preferences1 if (y,x) not in preferences1]
-            preferences1 = set(consistent_prefs1)
-            consistent_prefs2 = [(x,y) for x,y in preferences2 if (y,x) not in preferences2]
-            preferences2 = set(consistent_prefs2)
+            preferences1 -= {(y,x) for x,y in preferences1}
+            preferences2 -= {(y,x) for x,y in preferences2}
 
             if Agent.form_closure:
-                preferences1 = operators.transitive_closure(preferences1)
-                preferences2 = operators.transitive_closure(preferences2)
+                if preferences1 != prefs1:
+                    preferences1 = operators.transitive_closure(preferences1)
+                if preferences2 != prefs2:
+                    preferences2 = operators.transitive_closure(preferences2)
 
-        return (preferences1, preferences2)
+        return (_intern_preferences(preferences1), _intern_preferences(preferences2))
 
 
 class Probabilistic(Agent):
@@ -210,7 +274,27 @@ class Probabilistic(Agent):
         super().__init__(preferences, states, random_instance, rng)
         # Alongside initialising an uncertain preference set, a probabilistic agent
         # also needs an uncertain probability distribution over the set of states.
-        self.belief = [1/states for x in range(states)]
+        self.belief = np.full(states, 1/states)
+        # Buffer of pre-drawn Gaussian noise samples, refilled in batches to
+        # amortise the cost of calling into the NumPy generator per draw.
+        self._noise_buf = None
+        self._noise_idx = 0
+        self._noise_value = None
+
+
+    def _next_noise(self, noise_value):
+        """ Return the next pre-drawn Gaussian sample, refilling the buffer as needed. """
+
+        if self._noise_buf is None or self._noise_idx >= len(self._noise_buf)\
+            or noise_value != self._noise_value:
+            self._noise_buf = self.rng.normal(0, noise_value, size=1024)
+            self._noise_idx = 0
+            self._noise_value = noise_value
+
+        epsilon = self._noise_buf[self._noise_idx]
+        self._noise_idx += 1
+
+        return epsilon
 
 
     @staticmethod
@@ -223,32 +307,22 @@ class Probabilistic(Agent):
         # Using the product operator defined in (Lee at al. 2018) and detailed further in (Lawry et al. 2019).
         # When compared with a possibilistic approach, this operator can be adjusted to produce probabilistic
         # rankings of states.
+        belief1 = np.asarray(belief1, dtype=np.float64)
+        belief2 = np.asarray(belief2, dtype=np.float64)
         product_sum = np.dot(belief1, belief2)
-        new_belief = [
-            (belief1[i] * belief2[i]) /
-            product_sum
-            for i in range(len(belief1))
-        ]
         # print(belief1, belief2, "product = ", product_sum)
-        # print(new_belief)
+
+        # Operator undefined for two inconsistent beliefs: a zero product sum
+        # is the only way the fusion below can produce NaNs, so bail out
+        # before doing any of the division/dampening work.
+        if product_sum == 0.0:
+            return None
 
         # Adding a dampening factor to the product rule
         # Jonathan's preferred lambda value: 0.1
         var_lambda = 0.1
-        new_belief = [
-            (var_lambda * 1/len(new_belief)) + ((1 - var_lambda) * belief)
-            for belief in new_belief
-        ]
-        # print(new_belief)
-        # print()
 
-        invalid_belief = np.isnan(np.sum(new_belief))
-
-        if not invalid_belief:
-            return new_belief
-        else:
-            # Operator undefined for two inconsistent beliefs.
-            return None
+        return _product_fusion(belief1, belief2, var_lambda, product_sum)
 
 
     def evidential_updating(self, belief):
@@ -261,16 +335,19 @@ class Probabilistic(Agent):
             self.since_change += 1
             return
 
-        # Track the number of iterations.
-        if belief == self.belief:
+        # Track the number of iterations. An unchanged belief yields the
+        # same preference ordering, so skip rederiving it. The update copies
+        # in place so that beliefs held as views into a shared population
+        # matrix stay in sync.
+        if np.array_equal(belief, self.belief):
             self.since_change += 1
         else:
             self.since_change = 0
+            np.copyto(self.belief, belief)
+            self.identify_preferences()
 
         # print(belief)
 
-        self.belief = belief
-        self.identify_preferences()
         self.evidence += 1
 
 
@@ -285,16 +362,19 @@ class Probabilistic(Agent):
             self.since_change += 1
             return
 
-        # Track the number of iterations.
-        if belief == self.belief:
+        # Track the number of iterations. An unchanged belief yields the
+        # same preference ordering, so skip rederiving it. The update copies
+        # in place so that beliefs held as views into a shared population
+        # matrix stay in sync.
+        if np.array_equal(belief, self.belief):
             self.since_change += 1
         else:
             self.since_change = 0
+            np.copyto(self.belief, belief)
+            self.identify_preferences()
 
         # print(belief)
 
-        self.belief = belief
-        self.identify_preferences()
         self.interactions += 1
 
 
@@ -304,31 +384,23 @@ class Probabilistic(Agent):
         # Generate preference set from probability distribution:
         # - compare all elements pairwise
         # - if x > y, add (x, y), elif y > x, add (y, x), else, skip.
+        # The pairwise comparison is a single outer comparison in NumPy;
+        # ties simply produce no preference in either direction.
 
-        self.preferences = set()
+        belief = np.asarray(self.belief)
+        xs, ys = np.where(belief[:, None] > belief[None, :])
+        self.preferences = set(zip(xs.tolist(), ys.tolist()))
 
-        for x, i in enumerate(self.belief):
-            for y, j in enumerate(self.belief):
-                if y <= x:
-                    continue
-                if i > j:
-                    self.preferences.add((x,y))
-                elif j > i:
-                    self.preferences.add((y,x))
 
-
-    def random_evidence(self, states, true_order, noise_value, quality_values, comparison_errors):
+    def random_evidence(self, states, true_order, noise_value, quality_values, comparison_error_table):
         """ Generate a random piece of evidence regardless of current belief. """
 
-        evidence = [0.0 for x in range(states)]
-
-        random_state = self.random_instance.choice([x for x in range(states)])
+        random_state = self.random_instance.randrange(states)
+        quality = quality_values[random_state]
 
         if noise_value is None:
-            evidence[random_state] = (((states - 1) * quality_values[random_state]) + 1)/states
-            for i, ev in enumerate(evidence):
-                if i != random_state:
-                    evidence[i] = (1 - quality_values[random_state])/states
+            evidence = np.full(states, (1 - quality)/states)
+            evidence[random_state] = (((states - 1) * quality) + 1)/states
 
             return evidence
 
@@ -336,15 +408,12 @@ class Probabilistic(Agent):
 
         # Noise model 1: Normal distribution around q_i
 
-        epsilon = self.rng.normal(0, noise_value)
-        random_sample = quality_values[random_state] + epsilon
-        while (random_sample := quality_values[random_state] + epsilon) < 0 or random_sample > 1:
-            epsilon = self.rng.normal(0, noise_value)
+        epsilon = self._next_noise(noise_value)
+        while (random_sample := quality + epsilon) < 0 or random_sample > 1:
+            epsilon = self._next_noise(noise_value)
 
-        evidence[random_state] = (((states - 1) * (quality_values[random_state] + epsilon)) + 1)/states
-        for i, ev in enumerate(evidence):
-            if i != random_state:
-                evidence[i] = (1 - quality_values[random_state] - epsilon)/states
+        evidence = np.full(states, (1 - quality - epsilon)/states)
+        evidence[random_state] = (((states - 1) * (quality + epsilon)) + 1)/states
 
         # Noise model 2: Binary model of learning the wrong quality value if two states
         # are erroneously compared
@@ -367,13 +436,9 @@ class Average(Probabilistic):
         """
 
         # We implement an averaging operator that simply takes the midpoint between the two beliefs
-        # in an element-wise manner.
-        new_belief = [(belief1[i] + belief2[i]) / 2 for i in range(len(belief1))]
-
-        invalid_belief = np.isnan(np.sum(new_belief))
-
-        if not invalid_belief:
-            return new_belief
-        else:
-            # Operator undefined for two inconsistent beliefs.
-            return None
+        # in an element-wise manner. The midpoint of two valid distributions
+        # is always a valid distribution, so no inconsistency check is needed.
+        return _average_fusion(
+            np.asarray(belief1, dtype=np.float64),
+            np.asarray(belief2, dtype=np.float64)
+        )
@@ -1,8 +1,11 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.cm as cm
+import os
 import seaborn as sns; sns.set(font_scale=1)
 
+from concurrent.futures import ProcessPoolExecutor
+
 PERC_LOWER = 10
 PERC_UPPER = 90
 
@@ -16,70 +19,99 @@ connectivity_strings = ["{:.2f}".format(x) for x in connectivity_values]
 
 result_directory = "../../results/test_results/pddm-network/"
 
-for a, agents in enumerate(agents_set):
-    for s, states in enumerate(states_set):
-        for n, noise in enumerate(noise_values):
+# Scan the results directory once so that missing cells become an O(1)
+# membership test rather than a failed open() and exception per file.
+existing_files = set(os.listdir(result_directory)) if os.path.isdir(result_directory) else set()
+
+
+def average_error_cell(task):
+    """
+    Read the error file for a single heatmap cell and return its position
+    along with the average error, or None where the results file is missing.
+    Cells are independent of one another, so they can be processed in parallel.
+    """
+
+    e, c, agents, states, noise, er, con = task
+
+    file_name_parts = [
+        "error",
+        agents, "agents",
+        states, "states",
+        "{}".format(con),"con",
+        "{:.3f}".format(er), "er",
+        "{:.3f}".format(noise), "nv",
+        "no_cl"
+    ]
+    file_ext = ".csv"
+    file_name = "_".join(map(lambda x: str(x), file_name_parts)) + file_ext
+
+    if file_name not in existing_files:
+        return e, c, None
+
+    # Parse the whole file with NumPy's C reader; only the final
+    # (steady-state) row feeds into the heatmap cell.
+    steady_state_results = np.loadtxt(result_directory + file_name, delimiter=",", ndmin=2)
 
-            heatmap_results = np.array([[0.0 for x in connectivity_values] for y in evidence_rates])
+    return e, c, np.average(steady_state_results[-1])
 
-            skip = True
 
-            for e, er in enumerate(reversed(evidence_rates)):
-                for c, con in enumerate(connectivity_values):
+if __name__ == "__main__":
 
-                    file_name_parts = [
-                        "error",
-                        agents, "agents",
-                        states, "states",
-                        "{}".format(con),"con",
-                        "{:.3f}".format(er), "er",
-                        "{:.3f}".format(noise), "nv",
-                        "no_cl"
+    # One figure and axes reused for every heatmap: sns.heatmap would
+    # otherwise build fresh axes and a fresh colorbar per cell and leak
+    # memory over long sweeps.
+    fig, ax = plt.subplots()
+    colorbar = None
+
+    with ProcessPoolExecutor() as pool:
+
+        for a, agents in enumerate(agents_set):
+            for s, states in enumerate(states_set):
+                for n, noise in enumerate(noise_values):
+
+                    # Initialise with the obvious "missing" sentinel so absent
+                    # cells need no further handling below.
+                    heatmap_results = np.full((len(evidence_rates), len(connectivity_values)), 1.0)
+
+                    skip = True
+
+                    tasks = [
+                        (e, c, agents, states, noise, er, con)
+                        for e, er in enumerate(reversed(evidence_rates))
+                        for c, con in enumerate(connectivity_values)
                     ]
-                    file_ext = ".csv"
-                    file_name = "_".join(map(lambda x: str(x), file_name_parts)) + file_ext
-
-                    steady_state_results = []
-                    average_error = 0.0
-
-                    try:
-                        with open(result_directory + file_name, "r") as file:
-                            for line in file:
-                                steady_state_results = line
-
-                        steady_state_results = [float(x) for x in steady_state_results.strip().split(",")]
-
-                        average_error = np.average(steady_state_results)
-
-                        heatmap_results[e][c] = average_error
-
-                        skip = False
-
-                    except FileNotFoundError:
-                        # Add obvious missing entry into final results array here
-                        heatmap_results[e][c] = 1.0
-
-            if skip:
-                continue
-
-            print(heatmap_results)
-            cmap = sns.cm.rocket_r
-            ax = sns.heatmap(
-                heatmap_results,
-                # center=0,
-                cmap=cmap,
-                cbar_kws={"shrink": .75},
-                xticklabels=connectivity_strings,
-                yticklabels=list(reversed(evidence_strings)),
-                vmin=0, vmax=0.5,
-                linewidths=.5,
-                annot=True,
-                annot_kws={"size": 8},
-                fmt=".2f",
-                square=True
-            )
-            plt.title("Average error | {} agents, {} states, {} noise".format(agents, states, noise))
-            ax.set(xlabel='Connectivity', ylabel='Evidence rate')
-            # plt.show()
-            plt.savefig("../../results/graphs/pddm-network/hm_error_{}_agents_{}_states_{:.2f}_noise_er_con.pdf".format(agents, states, noise), bbox_inches="tight")
-            plt.clf()
\ No newline at end of file
+
+                    for e, c, average_error in pool.map(average_error_cell, tasks, chunksize=8):
+                        if average_error is not None:
+                            heatmap_results[e][c] = average_error
+                            skip = False
+
+                    if skip:
+                        continue
+
+                    print(heatmap_results)
+                    cmap = sns.cm.rocket_r
+                    ax.clear()
+                    sns.heatmap(
+                        heatmap_results,
+                        # center=0,
+                        cmap=cmap,
+                        cbar=False,
+                        xticklabels=connectivity_strings,
+                        yticklabels=list(reversed(evidence_strings)),
+                        vmin=0, vmax=0.5,
+                        linewidths=.5,
+                        annot=True,
+                        annot_kws={"size": 8},
+                        fmt=".2f",
+                        square=True,
+                        ax=ax
+                    )
+                    # The colour scale is fixed, so one shared colorbar serves
+                    # every heatmap in the sweep.
+                    if colorbar is None:
+                        colorbar = fig.colorbar(ax.collections[0], ax=ax, shrink=.75)
+                    ax.set_title("Average error | {} agents, {} states, {} noise".format(agents, states, noise))
+                    ax.set(xlabel='Connectivity', ylabel='Evidence rate')
+                    # plt.show()
+                    fig.savefig("../../results/graphs/pddm-network/hm_error_{}_agents_{}_states_{:.2f}_noise_er_con.pdf".format(agents, states, noise), bbox_inches="tight")
@@ -3,12 +3,17 @@ import math
 import matplotlib.pyplot as plt
 import matplotlib.cm as cm
 import numpy as np
+import os
+import pandas as pd
 import pickle
+import re
 import seaborn as sns; sns.set(font_scale=1.3)
 import sys
 sys.path.append("../utilities")
 from results import *
 
+from concurrent.futures import ProcessPoolExecutor
+
 PERC_LOWER = 10
 PERC_UPPER = 90
 
@@ -25,82 +30,121 @@ closure_strings = ["With", "Without"]
 
 result_directory = "../../results/test_results/pddm-network/"
 
-for s, states in enumerate(states_set):
-    for a, agents in enumerate(agents_set):
-
-        heatmap_results = np.array([[0.0 for x in noise_values] for y in evidence_rates])
+# Scan the results directory once so that missing cells become an O(1)
+# membership test rather than a failed open() and exception per file.
+existing_files = set(os.listdir(result_directory)) if os.path.isdir(result_directory) else set()
+
+# Parse the simulation parameters straight out of the file name, so all the
+# steady-state error files can be loaded up front and aggregated in one go.
+FILE_NAME_PATTERN = re.compile(
+    r"steady_state_error_(?P<agents>\d+)a_(?P<states>\d+)s_(?P<con>[\d.]+)con"
+    r"_(?P<er>[\d.]+)er_(?P<noise>[\d.]+)nv(?P<no_cl>_no_cl)?\.csv"
+)
+
+
+def load_record(file_name):
+    """
+    Parse a single steady-state error file into a record of its parameters
+    and overall mean error, or None for files that do not match the pattern.
+    Files are independent of one another, so they can be loaded in parallel.
+    """
+
+    match = FILE_NAME_PATTERN.fullmatch(file_name)
+    if match is None:
+        return None
+
+    mean_error = np.loadtxt(result_directory + file_name, delimiter=",", ndmin=2).mean()
+
+    return {
+        "agents": int(match["agents"]),
+        "states": int(match["states"]),
+        "con": float(match["con"]),
+        "er": float(match["er"]),
+        "noise": float(match["noise"]),
+        "closure": "without" if match["no_cl"] else "with",
+        "error": mean_error,
+    }
+
+
+if __name__ == "__main__":
+
+    # Load every matching file once and reduce the whole sweep with a single
+    # pivot, instead of re-opening files cell by cell inside nested loops.
+    with ProcessPoolExecutor() as pool:
+        records = [
+            record
+            for record in pool.map(load_record, sorted(existing_files), chunksize=8)
+            if record is not None
+        ]
+
+    data = pd.DataFrame(records)
+    if not data.empty:
+        data = data[data["con"] == connectivity_value]
+        pivot = data.pivot_table(
+            index=["states", "agents", "er", "noise"],
+            columns="closure",
+            values="error"
+        )
+    else:
+        pivot = None
 
-        data = None
+    # One figure and axes reused for every heatmap: sns.heatmap would
+    # otherwise build fresh axes and a fresh colorbar per cell and leak
+    # memory over long sweeps.
+    fig, ax = plt.subplots()
+    colorbar = None
 
-        whole_evidence_set = True
-        for e, er in enumerate(reversed(evidence_rates)):
-            for n, noise in enumerate(noise_values):
+    for s, states in enumerate(states_set):
+        for a, agents in enumerate(agents_set):
 
-                closure_data = None
+            # Initialise with the obvious "missing" sentinel so absent
+            # cells need no further handling below.
+            heatmap_results = np.full((len(evidence_rates), len(noise_values)), 1.0)
 
-                for c, cl in enumerate(closure):
+            for e, er in enumerate(reversed(evidence_rates)):
+                for n, noise in enumerate(noise_values):
 
-                    file_name_parts = [
-                        "steady_state_error",
-                        "{}a".format(agents),
-                        "{}s".format(states),
-                        "{:.2f}con".format(connectivity_value),
-                        "{:.2f}er".format(er),
-                        "{}nv{}".format(noise, cl)
-                    ]
-                    file_ext = ".csv"
-                    file_name = "_".join(map(lambda x: str(x), file_name_parts)) + file_ext
-                    # print(file_name)
                     try:
-                        with open(result_directory + file_name, "r") as file:
-                            # iteration = 0
-                            # for line in file:
-                            #     average_error = np.average([float(x) for x in line.strip().split(",")])
-
-                            data = [[float(x) for x in line.rstrip('\n').split(',')] for line in file]
-                            data = [np.average(x) for x in data]
-
-                            if closure_data is None:
-                                closure_data = data
-
-                    except FileNotFoundError:
-                        print("MISSING: " + file_name)
-                        heatmap_results[e][n] = 1.0
-                        whole_evidence_set = False
-
-                data = np.array(data) - np.array(closure_data)
-                heatmap_results[e][n] = np.average(data)
-
-        # if data is None or not whole_evidence_set:
-        #     continue
-
-        # print("Average Error: {} states | {} agents | {:.2f} noise".format(states, agents, noise))
-        # for c, cl in enumerate(closure):
-        #     print("{}: ".format(closure_strings[c]), end=" ")
-        #     for e, er in enumerate(evidence_rates):
-        #         print("[{} er]: {:.3f}".format(er, results[c][e]), end=" ")
-        #     print("")
-
-        ax = sns.heatmap(
-            heatmap_results,
-            center=0,
-            cbar=True,
-            # cbar_kws={"shrink": .75},
-            cbar_kws={"shrink": .7},
-            xticklabels=noise_strings,
-            yticklabels=list(reversed(evidence_strings)),
-            vmin=-0.1, vmax=0.1,
-            linewidths=.5,
-            # annot=True,
-            # annot_kws={"size": 8},
-            # fmt=".2f",
-            square=True
-        )
-
-        # To save heatmap only: use PDF cropping website, such as https://pdfresizer.com/
-
-        ax.set(xlabel=r'Noise $\lambda$', ylabel=r'Evidence rate $r$')
-        plt.tight_layout()
-        plt.savefig("../../results/graphs/pddm-network/hm_error_difference_{}_states_{}_agents.pdf".format(states, agents))
-
-        plt.clf()
\ No newline at end of file
+                        cell = pivot.loc[(states, agents, er, noise)]
+                    except (KeyError, AttributeError):
+                        print("MISSING: {} states | {} agents | {} er | {} nv".format(states, agents, er, noise))
+                        continue
+
+                    if pd.isna(cell.get("with")) or pd.isna(cell.get("without")):
+                        print("MISSING: {} states | {} agents | {} er | {} nv".format(states, agents, er, noise))
+                        continue
+
+                    heatmap_results[e][n] = cell["without"] - cell["with"]
+
+            # print("Average Error: {} states | {} agents | {:.2f} noise".format(states, agents, noise))
+            # for c, cl in enumerate(closure):
+            #     print("{}: ".format(closure_strings[c]), end=" ")
+            #     for e, er in enumerate(evidence_rates):
+            #         print("[{} er]: {:.3f}".format(er, results[c][e]), end=" ")
+            #     print("")
+
+            ax.clear()
+            sns.heatmap(
+                heatmap_results,
+                center=0,
+                cbar=False,
+                xticklabels=noise_strings,
+                yticklabels=list(reversed(evidence_strings)),
+                vmin=-0.1, vmax=0.1,
+                linewidths=.5,
+                # annot=True,
+                # annot_kws={"size": 8},
+                # fmt=".2f",
+                square=True,
+                ax=ax
+            )
+            # The colour scale is fixed, so one shared colorbar serves
+            # every heatmap in the sweep.
+            if colorbar is None:
+                colorbar = fig.colorbar(ax.collections[0], ax=ax, shrink=.7)
+
+            # To save heatmap only: use PDF cropping website, such as https://pdfresizer.com/
+
+            ax.set(xlabel=r'Noise $\lambda$', ylabel=r'Evidence rate $r$')
+            fig.tight_layout()
+            fig.savefig("../../results/graphs/pddm-network/hm_error_difference_{}_states_{}_agents.pdf".format(states, agents))
@@ -22,17 +22,40 @@ def transitive_closure(closure):
     wherever they might be missing.
     """
 
-    # Identify the transitive relations
-    # Source: https://stackoverflow.com/questions/8673482/transitive-closure-python-tuples
-    while True:
-        new_relations = set((x,w) for x,y in closure for q,w in closure if q == y)
-        # Form the union of the new relations with the current closure
-        closure_until_now = closure | new_relations
-
-        if closure_until_now == closure:
-            break
-
-        closure = closure_until_now
-
-    # Return the complete preference ordering closed under transitivity.
-    return closure
+    if not closure:
+        return closure
+
+    # Pack the relation into integer bit rows: bit y of rows[x] is set iff
+    # (x, y) is in the closure. Reachability then propagates bit-parallel:
+    # whenever x reaches y, x inherits the whole of y's row in a single OR,
+    # instead of pairing up tuples one at a time.
+    nodes = {node for pair in closure for node in pair}
+    rows = {node: 0 for node in nodes}
+    for x, y in closure:
+        rows[x] |= 1 << y
+
+    changed = True
+    while changed:
+        changed = False
+        for x in nodes:
+            row = rows[x]
+            new_row = row
+            remaining = row
+            while remaining:
+                y = (remaining & -remaining).bit_length() - 1
+                remaining &= remaining - 1
+                new_row |= rows[y]
+            if new_row != row:
+                rows[x] = new_row
+                changed = True
+
+    # Unpack the bit rows into the complete preference ordering closed
+    # under transitivity.
+    transitive_relations = set()
+    for x, row in rows.items():
+        while row:
+            y = (row & -row).bit_length() - 1
+            row &= row - 1
+            transitive_relations.add((x, y))
+
+    return transitive_relations
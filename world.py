@@ -1,13 +1,14 @@
 import argparse
+import concurrent.futures
 import networkx as nx
 from networkx.generators.small import sedgewick_maze_graph
 import numpy as np
+import os
 import random
 import sys
 import time
 
 from agents.agent import *
-from utilities import operators
 from utilities import preferences
 from utilities import results
 
@@ -40,18 +41,27 @@ noise_param = 0.01
 connectivity_values = [0.0, 0.01, 0.02, 0.05, 0.1, 0.5, 1.0]
 connectivity_value = 1.0
 # Store the quality values as we only need to generate them once
-quality_values = []
+quality_values = None
 # Store the generated comparison error values so that we only need to generate them once.
-comparison_errors = []
+comparison_errors = None
+# Full pairwise lookup table of comparison errors, indexed directly by the two
+# compared positions so the hot paths avoid recomputing distances.
+comparison_error_table = None
 
 # Set the type of agent: qualitative or probabilistic
 # (Pairwise preferences) Agent | Bandwidth | Probabilistic | Average
 prob_agent_types = ["probabilistic", "average"]
 agent_type = Probabilistic
 
+# The agent type is fixed for a whole run, so resolve the string dispatch on
+# the class name once here rather than on every pass through the hot loops.
+agent_type_name = agent_type.__name__.lower()
+is_prob_agent = agent_type_name in prob_agent_types
+is_bandwidth_agent = agent_type_name == "bandwidth"
+
 print("Agent type:", agent_type.__name__)
 
-if agent_type.__name__.lower() in prob_agent_types:
+if is_prob_agent:
     noise_params = [0.47, 0.33, 0.21, 0.12, 0.09, 0.07, 0.00]
 
 # Set the initialisation function for agent preferences - option to add additional
@@ -69,15 +79,118 @@ def initialisation(
     agents = [agent_type(init_preferences(states), states, random_instance, rng) for x in range(num_of_agents)]
 
     if graph_type == "ER":
-        edges = nx.gnp_random_graph(num_of_agents, connectivity, random_instance).edges
-
-    edges = map(lambda x: (agents[x[0]], agents[x[1]]), edges)
-    network.update(edges, agents)
+        # Draw the whole upper triangle of the adjacency matrix in one
+        # vectorised pass rather than generating candidate edges one at a
+        # time in Python, as nx.gnp_random_graph does.
+        rows, cols = np.triu_indices(num_of_agents, k=1)
+        if connectivity < 1.0:
+            chosen = rng.random(rows.size) < connectivity
+            rows, cols = rows[chosen], cols[chosen]
+        edges = zip(rows.tolist(), cols.tolist())
+
+    edges = [(agents[x[0]], agents[x[1]]) for x in edges]
+    # The graph object is purely a carrier for the per-test caches below;
+    # nothing reads the adjacency structure any more, so skip building the
+    # per-node dictionaries that network.update(edges, agents) would create.
+    # The topology is fixed for the duration of a test, so cache the edge
+    # list once for the fusion-pair sampling in the main loop, and the plain
+    # agents list so the hot loops iterate it instead of a NodeView.
+    network.graph["edge_list"] = edges
+    network.graph["agents"] = agents
+
+    if is_prob_agent:
+        # Structure-of-arrays storage: the world owns one contiguous matrix
+        # of beliefs and each agent's belief becomes a row view into it, so
+        # population-wide reductions can run over a single array.
+        beliefs = np.stack([agent.belief for agent in agents])
+        for i, agent in enumerate(agents):
+            agent.belief = beliefs[i]
+        network.graph["beliefs"] = beliefs
 
     return
 
+def _evidence_step_bandwidth(agent, states, true_order, true_prefs, random_instance):
+    """ Draw a piece of preference evidence and update a bandwidth-limited agent. """
+
+    evidence = agent.find_evidence(
+        states,
+        true_prefs,
+        noise_param,
+        comparison_error_table
+    )
+    agent.evidential_updating(agent_type.combine(agent.preferences, evidence, random_instance))
+
+
+def _evidence_step_preferences(agent, states, true_order, true_prefs, random_instance):
+    """ Draw a piece of preference evidence and update the agent's preferences. """
+
+    evidence = agent.find_evidence(
+        states,
+        true_prefs,
+        noise_param,
+        comparison_error_table
+    )
+    agent.evidential_updating(agent_type.combine(agent.preferences, evidence))
+
+
+def _evidence_batch_probabilistic(network, agents, selected, states, rng):
+    """
+    Draw evidence for every selected probabilistic agent in one vectorised
+    block and fuse it with their beliefs, leaving the per-agent bookkeeping
+    (steady-state counters, preference rederivation) to evidential_updating.
+    Equivalent to calling random_evidence and combine per agent, but with the
+    quality draws, noise rejection sampling and fusion arithmetic batched
+    into whole-population array operations.
+    """
+
+    beliefs = network.graph["beliefs"]
+
+    random_states = rng.integers(states, size=selected.size)
+    qualities = quality_values[random_states]
+
+    if noise_param is not None:
+        # Noise model 1: Normal distribution around q_i, rejecting samples
+        # that push the perceived quality outside [0, 1].
+        epsilon = rng.normal(0, noise_param, size=selected.size)
+        invalid = ((qualities + epsilon) < 0) | ((qualities + epsilon) > 1)
+        while np.any(invalid):
+            epsilon[invalid] = rng.normal(0, noise_param, size=int(invalid.sum()))
+            invalid = ((qualities + epsilon) < 0) | ((qualities + epsilon) > 1)
+        qualities = qualities + epsilon
+
+    evidence = np.tile(((1 - qualities) / states)[:, None], (1, states))
+    evidence[np.arange(selected.size), random_states] = (((states - 1) * qualities) + 1) / states
+
+    current = beliefs[selected]
+    if agent_type is Average:
+        fused = (current + evidence) / 2
+        consistent = np.ones(selected.size, dtype=bool)
+    else:
+        # Dampened product operator, as in Probabilistic.combine; rows with a
+        # zero product sum are inconsistent and yield no update.
+        var_lambda = 0.1
+        product_sum = np.einsum("ij,ij->i", current, evidence)
+        consistent = product_sum != 0.0
+        fused = np.empty_like(current)
+        np.divide(current * evidence, product_sum[:, None], out=fused, where=consistent[:, None])
+        fused = (var_lambda / states) + ((1 - var_lambda) * fused)
+
+    for row, index in enumerate(selected):
+        agents[index].evidential_updating(fused[row] if consistent[row] else None)
+
+
+# Bind the evidential-updating kernel for the configured agent type once, at
+# import time. Probabilistic evidence is handled by the batched kernel above.
+if is_prob_agent:
+    evidence_step = None
+elif is_bandwidth_agent:
+    evidence_step = _evidence_step_bandwidth
+else:
+    evidence_step = _evidence_step_preferences
+
+
 def main_loop(
-    states: int, network, true_order: [], true_prefs: [], mode: str, bandwidth_limit: int, random_instance
+    states: int, network, true_order: [], true_prefs: [], mode: str, bandwidth_limit: int, random_instance, rng
 ):
     """
     The main loop performs various actions in sequence until certain conditions are
@@ -86,38 +199,25 @@ def main_loop(
 
     # For each agent, provided that the agent is to receive evidence this iteration
     # according to the current evidence rate, have the agent perform evidential
-    # updating.
-    reached_convergence = True
-    for agent in network.nodes:
+    # updating. The per-agent Bernoulli draws are batched into a single
+    # vectorised call on the NumPy generator.
+    agents = network.graph["agents"]
+    evidence_mask = rng.random(len(agents)) <= evidence_rate
+
+    if is_prob_agent:
+        # All of this iteration's probabilistic evidence is drawn and fused
+        # in one batch over the shared beliefs matrix.
+        selected = np.nonzero(evidence_mask)[0]
+        if selected.size:
+            _evidence_batch_probabilistic(network, agents, selected, states, rng)
+        evidence_mask[:] = False
 
-        if random_instance.random() <= evidence_rate:
+    reached_convergence = True
+    for agent, has_evidence in zip(agents, evidence_mask):
 
+        if has_evidence:
             # Generate a random piece of evidence, selecting from the set of unknown states.
-            if agent_type.__name__.lower() in prob_agent_types:
-                evidence = agent.random_evidence(
-                    states,
-                    true_order,
-                    noise_param,
-                    quality_values,
-                    comparison_errors
-                )
-                agent.evidential_updating(agent_type.combine(agent.belief, evidence))
-            elif agent_type.__name__.lower() == "bandwidth":
-                evidence = agent.find_evidence(
-                    states,
-                    true_prefs,
-                    noise_param,
-                    comparison_errors
-                )
-                agent.evidential_updating(agent_type.combine(agent.preferences, evidence, random_instance))
-            else:
-                evidence = agent.find_evidence(
-                    states,
-                    true_prefs,
-                    noise_param,
-                    comparison_errors
-                )
-                agent.evidential_updating(agent_type.combine(agent.preferences, evidence))
+            evidence_step(agent, states, true_order, true_prefs, random_instance)
 
         reached_convergence &= agent.steady_state(steady_state_threshold)
 
@@ -133,25 +233,45 @@ def main_loop(
     # and they both adopt the resulting combination.
     if mode == "symmetric":
 
-        network_copy = network.copy()
+        edge_list = network.graph["edge_list"]
+        if not edge_list:
+            return True
 
         if fusion_rate is not None:
-            num_of_edges = int(network.number_of_nodes() * (fusion_rate/100))
+            num_of_edges = int(len(agents) * (fusion_rate/100))
         else:
             num_of_edges = 1
 
-        for i in range(num_of_edges):
-            try:
-                agent1, agent2 = random_instance.choice(list(network_copy.edges))
-            except IndexError:
-                return True
+        # Bind the combination operator once for the whole matching loop.
+        combine = agent_type.combine
+
+        # Greedily build a random matching from a sampled pool of candidate
+        # edges, skipping agents that have already fused this iteration; this
+        # avoids copying the entire graph just to remove used nodes. The
+        # candidate indices come from one vectorised draw without replacement.
+        candidates = rng.choice(len(edge_list), size=min(len(edge_list), num_of_edges * 4), replace=False)
+        used_agents = set()
+        pairs_formed = 0
 
-            if agent_type.__name__.lower() in prob_agent_types:
-                new_preference = agent_type.combine(agent1.belief, agent2.belief)
-            elif agent_type.__name__.lower() == "bandwidth":
-                new_preference = agent_type.combine(agent1.preferences, agent2.preferences, random_instance, bandwidth_limit)
+        for index in candidates:
+            if pairs_formed >= num_of_edges:
+                break
+            agent1, agent2 = edge_list[index]
+            if agent1 in used_agents or agent2 in used_agents:
+                continue
+            used_agents.add(agent1)
+            used_agents.add(agent2)
+            pairs_formed += 1
+
+            if is_prob_agent:
+                new_preference = combine(agent1.belief, agent2.belief)
+            elif is_bandwidth_agent:
+                new_preference = combine(
+                    agent1.preferences, agent2.preferences, random_instance, bandwidth_limit,
+                    agent1._pref_tuple, agent2._pref_tuple
+                )
             else:
-                new_preference = agent_type.combine(agent1.preferences, agent2.preferences)
+                new_preference = combine(agent1.preferences, agent2.preferences)
 
             if type(new_preference) is tuple:
                 agent1.update_preferences(new_preference[0])
@@ -161,9 +281,6 @@ def main_loop(
                 agent1.update_preferences(new_preference)
                 agent2.update_preferences(new_preference)
 
-            network_copy.remove_node(agent1)
-            network_copy.remove_node(agent2)
-
     # Asymmetric
     # if mode == "asymmetric":
     #   ...
@@ -171,6 +288,166 @@ def main_loop(
     return True
 
 
+def run_single_test(test, arguments, seed, bandwidth_limit, true_order, true_prefs, true_prefs_tuple):
+    """
+    Run one fully independent Monte-Carlo test and return its trajectory
+    columns, steady-state rows, highest iteration reached and timings, for
+    main() to assemble into the shared results arrays. Each test receives its
+    own seeded RNGs so that results stay reproducible when tests are run in
+    parallel worker processes.
+    """
+
+    random_instance = random.Random(seed)
+    rng = np.random.default_rng(seed)
+
+    start_runtime = time.time()
+    start_proc_time = time.process_time()
+
+    states = arguments.states
+    is_prob = is_prob_agent
+
+    # Per-test result columns; main() stacks these into the full arrays.
+    error_col = np.zeros(iteration_limit + 1)
+    uncertainty_col = np.zeros(iteration_limit + 1)
+    probability_col = np.zeros((iteration_limit + 1, states))
+    preference_col = np.zeros((iteration_limit + 1, states - 1))
+    steady_state_error = np.zeros(arguments.agents)
+    steady_state_probability = np.zeros((arguments.agents, states))
+    steady_state_preference = np.zeros((arguments.agents, states - 1), dtype=int)
+    steady_state_uncertainty = np.zeros(arguments.agents)
+
+    network = nx.Graph()
+
+    # Boolean lookup of the true preference relation, for batch error and
+    # uncertainty computation over the beliefs matrix.
+    true_prefs_matrix = np.zeros((states, states), dtype=bool)
+    for x, y in true_prefs:
+        true_prefs_matrix[x, y] = True
+
+    # Initial setup of agents and environment.
+    initialisation(
+        arguments.agents,
+        states,
+        network,
+        arguments.connectivity,
+        random_instance,
+        rng
+    )
+
+    # Pre-loop results based on agent initialisation.
+    for agent in network.graph["agents"]:
+        error_col[0] += results.error(agent.preferences, true_prefs)
+        uncertainty_col[0] += results.uncertainty(agent.preferences, true_prefs)
+
+    if is_prob:
+        np.sum(network.graph["beliefs"], axis=0, out=probability_col[0])
+
+    def record_iteration(iteration, steady_state):
+        """
+        Shared accounting for a single iteration: accumulate the trajectory
+        columns and, once a steady state is reached, fill in the per-agent
+        steady-state rows. Used by both the converged and non-converged
+        branches of the iteration loop below. Each agent's error and
+        uncertainty are computed exactly once and reused for both the
+        trajectory sums and the steady-state rows.
+        """
+        if is_prob:
+            # A probabilistic agent's preferences are exactly the pairwise
+            # ordering of its belief vector, so the population's error and
+            # uncertainty reduce to array operations on the beliefs matrix:
+            # an inverted pair is a held preference whose reverse is in the
+            # true relation, and the missing pairs fall out of the relation
+            # sizes, as in results.error and results.uncertainty.
+            beliefs = network.graph["beliefs"]
+            held = beliefs[:, :, None] > beliefs[:, None, :]
+            inversions = np.logical_and(held, true_prefs_matrix.T).sum(axis=(1, 2))
+            missing = np.abs(len(true_prefs) - held.sum(axis=(1, 2)))
+            errors = (inversions + (0.5 * missing)) / len(true_prefs)
+            uncertainties = missing / len(true_prefs)
+            error_col[iteration] = errors.sum()
+            uncertainty_col[iteration] = uncertainties.sum()
+            if steady_state:
+                steady_state_error[:] = errors
+                steady_state_uncertainty[:] = uncertainties
+                steady_state_probability[:] = beliefs
+                steady_state_preference[:] = (beliefs[:, 1:] > beliefs[:, :-1])[:, ::-1]
+            return
+
+        error_fn = results.error
+        uncertainty_fn = results.uncertainty
+        for a, agent in enumerate(network.graph["agents"]):
+            error = error_fn(agent.preferences, true_prefs)
+            error_col[iteration] += error
+            uncertainty = uncertainty_fn(agent.preferences, true_prefs)
+            uncertainty_col[iteration] += uncertainty
+            if steady_state:
+                steady_state_error[a] = error
+                steady_state_uncertainty[a] = uncertainty
+
+    # Main loop of the experiments. Starts at 1 because we have recorded the agents'
+    # initial state above, at the "0th" index.
+    max_iteration = 0
+    for iteration in range(1, iteration_limit + 1):
+        # Progress output is throttled: a formatted write per iteration is
+        # measurable against the cost of short iterations.
+        if iteration % 100 == 0:
+            print("Test #{} - Iteration #{}    ".format(test, iteration), end="\r")
+        # While not converged, continue to run the main loop.
+        if main_loop(states, network, true_order, true_prefs_tuple, mode, bandwidth_limit, random_instance, rng):
+            if is_prob:
+                # Accumulate the population's probability mass with a single
+                # reduction over the beliefs matrix, and count the preference
+                # "crossings" with one outer comparison, instead of a Python
+                # pass over each agent's belief vector.
+                beliefs = network.graph["beliefs"]
+                np.sum(beliefs, axis=0, out=probability_col[iteration])
+                preference_col[iteration] = (
+                    beliefs[:, 1:] > beliefs[:, :-1]
+                )[:, ::-1].sum(axis=0)
+            record_iteration(iteration, iteration == iteration_limit)
+
+        # If the simulation has converged, end the test.
+        else:
+            # print("Converged: ", iteration)
+            record_iteration(iteration, True)
+            # The trajectory tail past the convergence point is left as-is;
+            # main() forward-fills converged tests lazily, and only as far as
+            # the rows that are actually exported.
+            break
+
+    # The iteration counter is monotone, so the last executed iteration is
+    # the maximum; no need to track it inside the loop.
+    max_iteration = iteration
+
+    process_time = time.time() - start_runtime
+    runtime = time.process_time() - start_proc_time
+
+    return (
+        error_col, uncertainty_col, probability_col, preference_col,
+        steady_state_error, steady_state_probability,
+        steady_state_preference, steady_state_uncertainty,
+        max_iteration, process_time, runtime
+    )
+
+
+# Result buffers are reused across sweep invocations of main(): their shapes
+# depend only on the parsed arguments, so each call re-zeroes the existing
+# arrays in place instead of reallocating and re-touching the same pages for
+# every sweep point.
+_result_buffers = {}
+
+def _zeroed_buffer(name, shape, dtype=float):
+    """ Return the named results array, allocating or zeroing as needed. """
+
+    buffer = _result_buffers.get(name)
+    if buffer is None or buffer.shape != shape:
+        buffer = np.zeros(shape, dtype=dtype)
+        _result_buffers[name] = buffer
+    else:
+        buffer.fill(0)
+    return buffer
+
+
 def main():
     """
     Main function for simulation experiments. Allows us to initiate start-up
@@ -198,16 +475,10 @@ def main():
         print("Usage error: Connectivity must be specified for node-only graph.")
         sys.exit(0)
 
-    # Create an instance of a RNG that is either seeded for consistency of simulation
-    # results, or create using a random seed for further testing.
-    random_instance = random.Random()
-    random_instance.seed(128) if arguments.random == None else random_instance.seed()
-    rng = np.random.default_rng(128) if arguments.random == None else np.random.default_rng
-
     # Output variables
     directory = "../results/test_results/pddm-network/"
-    if agent_type.__name__.lower() != "agent":
-        directory += "{}/".format(agent_type.__name__.lower())
+    if agent_type_name != "agent":
+        directory += "{}/".format(agent_type_name)
     file_name_params = []
 
     if fusion_rate is not None:
@@ -219,23 +490,31 @@ def main():
 
     # For the probabilistic agent:
     # Set the quality values at uniform intervals i/(n+1) for i = 1, ..., n states.
-    quality_values[:] = [round(i/(arguments.states + 1), 5) for i in range(1, arguments.states + 1)]
+    global quality_values
+    quality_values = np.array([round(i/(arguments.states + 1), 5) for i in range(1, arguments.states + 1)])
     print(quality_values)
 
     bandwidth_limit = None
-    if agent_type.__name__.lower() == "bandwidth":
+    if is_bandwidth_agent:
         bandwidth_limit = arguments.states
         print("bandwidth limit:", bandwidth_limit)
 
-    comparison_errors[:] = []
+    global comparison_errors, comparison_error_table
     if noise_param is not None:
-        for state in range(1, arguments.states):
-            comparison_errors.append(
-                preferences.comparison_error(
-                    state / arguments.states,
-                    noise_param
-                )
+        comparison_errors = np.array([
+            preferences.comparison_error(
+                state / arguments.states,
+                noise_param
             )
+            for state in range(1, arguments.states)
+        ])
+        comparison_error_table = np.array([
+            [ comparison_errors[abs(i - j) - 1] if i != j else 0.0 for j in range(arguments.states) ]
+            for i in range(arguments.states)
+        ])
+    else:
+        comparison_errors = np.array([])
+        comparison_error_table = None
     print(comparison_errors)
 
     # True state of the world
@@ -244,44 +523,30 @@ def main():
     opposite_prefs = []
 
     true_order = [x for x in reversed(range(arguments.states))]
-    true_prefs = init_preferences(arguments.states)
-    opposite_prefs = init_preferences(arguments.states)
-    for i in range(len(true_order) - 1):
-        true_prefs.add((true_order[i], true_order[i + 1]))
-        opposite_prefs.add((true_order[i + 1],true_order[i]))
-    true_prefs = operators.transitive_closure(true_prefs)
-    opposite_prefs = operators.transitive_closure(opposite_prefs)
+    # The true ordering is a total order, so its transitive closure is known
+    # analytically: every state is preferred to every lower-valued state.
+    # No need to run the closure algorithm on the chain.
+    true_prefs = {(i, j) for i in range(arguments.states) for j in range(i)}
+    opposite_prefs = {(j, i) for i in range(arguments.states) for j in range(i)}
     # print(sorted(true_prefs, reverse=True))
+    # A tuple view of the true preferences allows agents to index directly
+    # into the ordering when drawing evidence.
+    true_prefs_tuple = tuple(true_prefs)
 
-    # Set up the collecting of results
-    error_results = np.array([
-        [ 0.0 for y in range(tests) ] for z in range(iteration_limit + 1)
-    ])
-    steady_state_error_results = np.array([
-        [ 0.0 for y in range(arguments.agents) ] for z in range(tests)
-    ])
+    # Set up the collecting of results, reusing the buffers across sweep
+    # invocations.
+    error_results = _zeroed_buffer("error", (iteration_limit + 1, tests))
+    steady_state_error_results = _zeroed_buffer("steady_state_error", (tests, arguments.agents))
 
     # if agent_type.__name__.lower() in prob_agent_types:
-    probability_results = np.array([
-        [ [ 0.0 for x in range(arguments.states) ] for y in range(tests) ] for z in range(iteration_limit + 1)
-    ])
-    steady_state_probability_results = np.array([
-        [ [ 0.0 for x in range(arguments.states) ] for y in range(arguments.agents) ] for z in range(tests)
-    ])
-
-    preference_results = np.array([
-        [ [ 0.0 for x in range(arguments.states - 1) ] for y in range(tests) ] for z in range(iteration_limit + 1)
-    ])
-    steady_state_preference_results = np.array([
-        [ [ 0 for x in range(arguments.states - 1) ] for y in range(arguments.agents) ] for z in range(tests)
-    ])
-
-    uncertainty_results = np.array([
-        [ 0.0 for y in range(tests) ] for z in range(iteration_limit + 1)
-    ])
-    steady_state_uncertainty_results = np.array([
-        [ 0.0 for y in range(arguments.agents) ] for z in range(tests)
-    ])
+    probability_results = _zeroed_buffer("probability", (iteration_limit + 1, tests, arguments.states))
+    steady_state_probability_results = _zeroed_buffer("steady_state_probability", (tests, arguments.agents, arguments.states))
+
+    preference_results = _zeroed_buffer("preference", (iteration_limit + 1, tests, arguments.states - 1))
+    steady_state_preference_results = _zeroed_buffer("steady_state_preference", (tests, arguments.agents, arguments.states - 1), dtype=int)
+
+    uncertainty_results = _zeroed_buffer("uncertainty", (iteration_limit + 1, tests))
+    steady_state_uncertainty_results = _zeroed_buffer("steady_state_uncertainty", (tests, arguments.agents))
 
     process_time_results = [ 0.0 for y in range(tests + 1) ]
     runtime_results = [ 0.0 for y in range(tests + 1) ]
@@ -289,84 +554,60 @@ def main():
     init_proc_time = time.process_time()
     init_runtime = time.time()
 
-    # Repeat the initialisation and loop for the number of simulation runs required
+    # Repeat the initialisation and loop for the number of simulation runs
+    # required. Each test is a fully independent replicate, so they are farmed
+    # out across processor cores; workers are seeded deterministically unless
+    # random seeding of the RNGs was requested.
     max_iteration = 0
-    for test in range(tests):
-
-        start_runtime = time.time()
-        start_proc_time = time.process_time()
-
-        network = nx.Graph()
-
-        # Initial setup of agents and environment.
-        initialisation(
-            arguments.agents,
-            arguments.states,
-            network,
-            arguments.connectivity,
-            random_instance,
-            rng
-        )
-
-        # Pre-loop results based on agent initialisation.
-        for agent in network.nodes:
-            error_results[0][test] += results.error(agent.preferences, true_prefs)
-            uncertainty_results[0][test] += results.uncertainty(agent.preferences, true_prefs)
-
-            if agent_type.__name__.lower() in prob_agent_types:
-                np.add(probability_results[0][test], agent.belief, out=probability_results[0][test])
-
-        # Main loop of the experiments. Starts at 1 because we have recorded the agents'
-        # initial state above, at the "0th" index.
-        for iteration in range(1, iteration_limit + 1):
-            print("Test #{} - Iteration #{}    ".format(test, iteration), end="\r")
-            max_iteration = iteration if iteration > max_iteration else max_iteration
-            # While not converged, continue to run the main loop.
-            if main_loop(arguments.states, network, true_order, true_prefs, mode, bandwidth_limit, random_instance):
-                for a, agent in enumerate(network.nodes):
-                    error = results.error(agent.preferences, true_prefs)
-                    error_results[iteration][test] += error
-                    if agent_type.__name__.lower() in prob_agent_types:
-                        np.add(probability_results[iteration][test], agent.belief, out=probability_results[iteration][test])
-                        for i in range(arguments.states - 1, 0, -1):
-                            if agent.belief[i] > agent.belief[i - 1]:
-                                preference_results[iteration][test][arguments.states - 1 - i] += 1
-                    uncertainty = results.uncertainty(agent.preferences, true_prefs)
-                    uncertainty_results[iteration][test] += uncertainty
-                    if iteration == iteration_limit:
-                        steady_state_error_results[test][a] = error
-                        if agent_type.__name__.lower() in prob_agent_types:
-                            steady_state_probability_results[test][a] = agent.belief
-                            for i in range(arguments.states - 1, 0, -1):
-                                if agent.belief[i] > agent.belief[i - 1]:
-                                    steady_state_preference_results[test][a][arguments.states - 1 - i] = 1
-                        steady_state_uncertainty_results[test][a] = uncertainty
-
-            # If the simulation has converged, end the test.
-            else:
-                # print("Converged: ", iteration)
-                for a, agent in enumerate(network.nodes):
-                    error = results.error(agent.preferences, true_prefs)
-                    error_results[iteration][test] += error
-                    uncertainty = results.uncertainty(agent.preferences, true_prefs)
-                    uncertainty_results[iteration][test] += uncertainty
-                    steady_state_error_results[test][a] = error
-                    if agent_type.__name__.lower() in prob_agent_types:
-                        steady_state_probability_results[test][a] = agent.belief
-                        for i in range(arguments.states - 1, 0, -1):
-                            if agent.belief[i] > agent.belief[i - 1]:
-                                steady_state_preference_results[test][a][arguments.states - 1 - i] = 1
-                    steady_state_uncertainty_results[test][a] = uncertainty
-                for iter in range(iteration + 1, iteration_limit + 1):
-                    error_results[iter][test] = np.copy(error_results[iteration][test])
-                    if agent_type.__name__.lower() in prob_agent_types:
-                        probability_results[iter][test] = np.copy(probability_results[iteration][test])
-                    uncertainty_results[iter][test] = np.copy(uncertainty_results[iteration][test])
-                # Simulation has converged, so break main loop.
-                break
-
-        process_time_results[test] = time.time() - start_runtime
-        runtime_results[test] = time.process_time() - start_proc_time
+    test_final_iterations = [0 for test in range(tests)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        test_futures = [
+            executor.submit(
+                run_single_test,
+                test,
+                arguments,
+                128 + test if arguments.random == None else None,
+                bandwidth_limit,
+                true_order,
+                true_prefs,
+                true_prefs_tuple
+            )
+            for test in range(tests)
+        ]
+
+        for test, future in enumerate(test_futures):
+            (
+                error_col, uncertainty_col, probability_col, preference_col,
+                steady_state_error, steady_state_probability,
+                steady_state_preference, steady_state_uncertainty,
+                test_max_iteration, process_time, runtime
+            ) = future.result()
+
+            error_results[:, test] = error_col
+            uncertainty_results[:, test] = uncertainty_col
+            steady_state_error_results[test] = steady_state_error
+            steady_state_uncertainty_results[test] = steady_state_uncertainty
+            if is_prob_agent:
+                probability_results[:, test, :] = probability_col
+                preference_results[:, test, :] = preference_col
+                steady_state_probability_results[test] = steady_state_probability
+                steady_state_preference_results[test] = steady_state_preference
+
+            max_iteration = max(max_iteration, test_max_iteration)
+            test_final_iterations[test] = test_max_iteration
+            process_time_results[test] = process_time
+            runtime_results[test] = runtime
+
+    # Lazily forward-fill tests that converged before the longest-running
+    # test, and only up to the last row write_to_file will export, rather
+    # than padding every trajectory out to the full iteration limit.
+    fill_limit = min(max_iteration + 1, iteration_limit)
+    for test, final_iteration in enumerate(test_final_iterations):
+        if final_iteration < fill_limit:
+            error_results[final_iteration + 1:fill_limit + 1, test] = error_results[final_iteration, test]
+            uncertainty_results[final_iteration + 1:fill_limit + 1, test] = uncertainty_results[final_iteration, test]
+            if is_prob_agent:
+                probability_results[final_iteration + 1:fill_limit + 1, test, :] = probability_results[final_iteration, test, :]
 
     print()
 
@@ -378,7 +619,7 @@ def main():
 
     # Post-loop results processing (normalisation).
     error_results /= arguments.agents
-    if agent_type.__name__.lower() in prob_agent_types:
+    if is_prob_agent:
         probability_results /= arguments.agents
         preference_results /= arguments.agents
     uncertainty_results /= arguments.agents
@@ -402,7 +643,7 @@ def main():
 
     file_name_params.append("{:.2f}er".format(evidence_rate))
     if noise_param is not None:
-        if agent_type.__name__.lower() in prob_agent_types:
+        if is_prob_agent:
             file_name_params.append("{:.2f}nv".format(noise_param))
         else:
             file_name_params.append("{:.1f}nv".format(noise_param))
@@ -437,7 +678,7 @@ def main():
         tests
     )
 
-    if agent_type.__name__.lower() in prob_agent_types:
+    if is_prob_agent:
         if arguments.agents in trajectory_populations:
             results.write_to_file(
                 directory,